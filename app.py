@@ -1,552 +1,257 @@
 import os
-import re
-import zipfile
-import shutil
+import time
+import hashlib
+import importlib.util
+import asyncio
+import tempfile
+import threading
 from pathlib import Path
-from datetime import datetime
+from string import Template
 from textwrap import dedent
 import json
 
 import streamlit as st
 
-# Try to import litellm lazily
 try:
-    from litellm import completion
-    LITELLM_AVAILABLE = True
-except ImportError:
-    completion = None
-    LITELLM_AVAILABLE = False
+    import orjson
+except ImportError:  # optional; the stdlib json module is used when it is missing
+    orjson = None
+
+# Pure helpers live in builder.py so they can be imported without Streamlit
+from builder import (
+    encode_files,
+    files_digest,
+    make_zip_from_files,
+    mock_generator_from_settings,
+    safe_extract_code_blocks,
+    strip_code_fence,
+    write_files,
+)
 
 # ---------------------
 # Configuration
 # ---------------------
-OUTPUT_ROOT = Path("output")
-OUTPUT_ROOT.mkdir(exist_ok=True, parents=True)
+OUTPUT_ROOT = Path("output")  # created on first write by write_files
+LLM_CACHE_DIR = OUTPUT_ROOT / ".llm_cache"  # LLM responses persisted across sessions
+LLM_CACHE_TTL = 3600  # seconds; applies to both the in-memory and the on-disk response cache
+LLM_CACHE_MAX_ENTRIES = 256  # oldest on-disk responses beyond this are pruned
+PREVIEW_MAX_BYTES = 256 * 1024  # larger pages are not inlined into the preview iframe
+GEN_CACHE_SIZE = 4  # generation results kept per session for reruns with unchanged answers
 
 DEFAULT_GROQ_MODELS = [
     "groq/llama-3.3-70b-versatile",
     "groq/llama-3.1-8b-instant",
 ]
 
-# ---------------------
-# Utilities
-# ---------------------
-def timestamped_folder(base: Path, prefix: str = "project"):
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    folder = base / f"{prefix}_{ts}"
-    folder.mkdir(parents=True, exist_ok=True)
-    return folder
-
-def make_zip_from_folder(folder: Path, zip_path: Path):
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file in folder.rglob("*"):
-            if file.is_file():
-                zf.write(file, arcname=file.relative_to(folder))
-
-def safe_extract_code_blocks(text: str):
-    files = {}
-    # Try --- filename --- ... --- end --- pattern
-    pattern = r"---\s*(.*?)\s*---\n(.*?)---\s*end\s*---"
-    matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
-    if matches:
-        for filename, content in matches:
-            files[filename.strip()] = content.strip()
-        return files
-
-    # Fallback: markdown-style codeblocks
-    codeblocks = re.findall(r"```(?:\w+)?\n(.*?)```", text, re.DOTALL)
-    for i, cb in enumerate(codeblocks, 1):
-        files[f"file_{i}.txt"] = cb.strip()
-
-    # Fallback: HTML detection
-    if not files and ("<html" in text.lower() or "<!doctype html" in text.lower()):
-        files["index.html"] = text.strip()
+# Files requested (one LLM call each) when generating with the model
+FILE_PLAN = {
+    "React + Tailwind": [
+        "package.json", "index.html", "tailwind.config.cjs", "postcss.config.cjs",
+        "src/index.css", "src/main.jsx", "src/App.jsx", "src/styles.css",
+    ],
+    "Static HTML/CSS": ["index.html", "styles.css"],
+}
 
-    return files
+# Prompt describing the user's answers, compiled once; same bytes for the same answers
+COMBINED_PROMPT = Template("""Create a complete $framework project with the following settings:
+Title: $title
+Navbar: $navbar (color: $navbar_color)
+Sidebar: $sidebar
+Pages: $pages
+Footer: $footer
+Login page: $login
+Charts: $charts
+Theme: $theme
+Custom color: $custom_color
+""")
 
 # ---------------------
-# Mock generator (creates a real React + Tailwind project or static HTML)
+# LLM Generator wrapper (keeps previous behaviour but now uses a composed prompt)
 # ---------------------
-def mock_generator_from_settings(settings: dict, framework: str):
-    """
-    settings: dict containing
-      - title: str
-      - navbar: bool
-      - navbar_color: str (like 'bg-brown-700' or hex)
-      - sidebar: bool
-      - pages: list of page names (strings)
-      - advanced: bool
-      - footer: bool
-      - login: bool
-      - charts: bool
-      - theme: 'light'|'dark'|'custom'
-      - custom_color: str
-    framework: "React + Tailwind" or "Static HTML/CSS"
-    """
-    title = settings.get("title", "My Site")
-    navbar = settings.get("navbar", True)
-    navbar_color = settings.get("navbar_color", "#5B2E0F")
-    sidebar = settings.get("sidebar", True)
-    pages = settings.get("pages", ["Home"])
-    footer = settings.get("footer", False)
-    login = settings.get("login", False)
-    charts = settings.get("charts", False)
-    theme = settings.get("theme", "light")
-    custom_color = settings.get("custom_color", "#5B2E0F")
-    about = settings.get("about", False)
-    contact = settings.get("contact", False)
-
-
-    files = {}
+@st.cache_resource
+def _event_loop():
+    # One long-lived loop so the router's pooled async HTTP connections survive between calls
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+@st.cache_resource
+def _litellm_router_cls():
+    # Imported once per process, and only when the LLM path is actually used; None when litellm is not installed
+    # Use the bundled model cost map instead of fetching it over the network at import time
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    try:
+        from litellm import Router
+    except ImportError:
+        return None
+    return Router
+
+@st.cache_resource
+def _router(model: str, api_key: str):
+    # Reused across generations: keeps connections/TLS sessions warm and handles retries and rate limits
+    router_cls = _litellm_router_cls()
+    if router_cls is None:
+        raise RuntimeError("litellm is not installed; run `pip install litellm` to generate with the model")
+    return router_cls(
+        model_list=[{"model_name": "default", "litellm_params": {"model": model, "api_key": api_key}}],
+        num_retries=2,
+        timeout=30,
+    )
 
-    if "react" in framework.lower():
-        # package.json (include both start and dev for convenience)
-        package_json = {
-            "name": "generated-frontend",
-            "version": "1.0.0",
-            "private": True,
-            "scripts": {
-                "start": "vite",
-                "dev": "vite",
-                "build": "vite build"
-            },
-            "dependencies": {
-                "react": "^18.2.0",
-                "react-dom": "^18.2.0",
-                "react-router-dom": "^6.14.1"
-            },
-            "devDependencies": {
-                "vite": "^4.5.0",
-                "tailwindcss": "^3.5.0",
-                "postcss": "^8.4.0",
-                "autoprefixer": "^10.4.0"
-            }
-        }
-        files["package.json"] = json.dumps(package_json, indent=2)
-
-        # Vite index.html (entry)
-        files["index.html"] = dedent("""<!DOCTYPE html>
-        <html lang="en">
-        <head>
-          <meta charset="UTF-8" />
-          <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-          <title>Generated React App</title>
-        </head>
-        <body>
-          <div id="root"></div>
-          <script type="module" src="/src/main.jsx"></script>
-        </body>
-        </html>""")
-
-        # tailwind config (simple)
-        files["tailwind.config.cjs"] = dedent("""module.exports = {
-  content: ["./index.html", "./src/**/*.{js,jsx}"],
-  theme: {
-    extend: {},
-  },
-  plugins: [],
-}""")
-
-        files["postcss.config.cjs"] = dedent("""module.exports = {
-  plugins: {
-    tailwindcss: {},
-    autoprefixer: {},
-  }
-}""")
-
-        # src/index.css (Tailwind directives)
-        files["src/index.css"] = dedent("""@tailwind base;
-@tailwind components;
-@tailwind utilities;
-
-/* custom global styles */
-body { @apply bg-white text-gray-900; }
-.dark body { @apply bg-gray-900 text-gray-100; }""")
-
-        # src/main.jsx
-        files["src/main.jsx"] = dedent("""import React from 'react';
-import { createRoot } from 'react-dom/client';
-import { BrowserRouter as Router } from 'react-router-dom';
-import App from './App.jsx';
-import './index.css';
-createRoot(document.getElementById('root')).render(
-  <React.StrictMode>
-    <Router>
-      <App />
-    </Router>
-  </React.StrictMode>
-);""")
-
-        # Build App.jsx using placeholders and plain string (no f-strings)
-        app_template = """
-import React, { useState } from 'react';
-import { Routes, Route, Link } from 'react-router-dom';
-PLACEHOLDER_IMPORTS
-
-export default function App() {
-  const [dark, setDark] = useState(false);
-  return (
-    <div className={dark ? 'dark' : ''}>
-      <div className="min-h-screen flex">
-        PLACEHOLDER_SIDEBAR
-        <div className="flex-1 flex flex-col">
-          PLACEHOLDER_NAV
-          <main className="p-6 flex-1">
-            <Routes>
-              PLACEHOLDER_ROUTES
-            </Routes>
-          </main>
-          PLACEHOLDER_FOOTER
-        </div>
-      </div>
-    </div>
-  );
-}
-"""
-        # Create imports, sidebar, nav, routes, footer based on settings
-        imports = ""
-        sidebar_code = ""
-        nav_code = ""
-        routes_code = ""
-        footer_code = ""
-
-        # Pages components content
-        page_files = {}
-        for p in pages:
-            comp_name = ''.join(word.capitalize() for word in p.split())
-            page_js = f"""
-import React from 'react';
-export default function {comp_name}() {{
-  return (
-    <div>
-      <h2 className="text-2xl font-semibold mb-4">{p}</h2>
-      <p>This is the {p} page generated by the Website Builder Agent.</p>
-      PLACEHOLDER_EXTRA
-    </div>
-  );
-}}
-"""
-            extra = ""
-            
-            if charts and p.lower() in ("analytics", "dashboard", "home"):
-                extra = "<div className='mt-4 p-4 border rounded'>[Chart placeholder — replace with real chart]</div>"
-            page_js = page_js.replace("PLACEHOLDER_EXTRA", extra)
-            page_files[f"src/pages/{comp_name}.jsx"] = dedent(page_js)
-
-            # import line for the page in App
-            imports += f"import {comp_name} from './pages/{comp_name}.jsx';\n"
-
-            # route entry
-            route_path = "/" if p.lower() == "home" else "/" + p.lower().replace(" ", "-")
-            route_code = '<Route path="' + route_path + '" element={' + '<' + comp_name + ' />' + '} />\n'
-            routes_code += route_code
-
-        # Track already-added pages
-        # ------------------------------
-        pages_added = set(pages)  # start with whatever user gave
-
-        # ------------------------------
-        # Extra pages: About, Contact, Login
-        # ------------------------------
-        if settings.get("about") and "About" not in pages_added:
-            imports += "import About from './pages/About.jsx';\n"
-            routes_code += '<Route path="/about" element={<About />} />\n'
-            page_files["src/pages/About.jsx"] = dedent("""\
-            import React from 'react';
-            export default function About() {
-              return (
-                <div>
-                  <h2 className="text-2xl font-semibold mb-4">About Us</h2>
-                  <p>Welcome to our website! This is the about page.</p>
-                </div>
-              );
-            }
-            """)
-            pages_added.add("About")
-
-        if settings.get("contact") and "Contact" not in pages_added:
-          imports += "import Contact from './pages/Contact.jsx';\n"
-          routes_code += '<Route path="/contact" element={<Contact />} />\n'
-          page_files["src/pages/Contact.jsx"] = dedent("""\
-    import React, { useState } from 'react';
-
-    export default function Contact() {
-      const [form, setForm] = useState({ name: "", email: "", message: "" });
-
-      const handleChange = (e) => {
-        setForm({ ...form, [e.target.name]: e.target.value });
-      };
-
-      const handleSubmit = (e) => {
-        e.preventDefault();
-        alert(`Message sent!\\nName: ${form.name}\\nEmail: ${form.email}\\nMessage: ${form.message}`);
-        setForm({ name: "", email: "", message: "" }); // reset
-      };
-
-      return (
-        <div className="flex flex-col items-center p-6">
-          <h2 className="text-2xl font-semibold mb-6">Contact Us</h2>
-          <form
-            onSubmit={handleSubmit}
-            className="flex flex-col space-y-4 w-full max-w-md bg-white p-6 rounded-2xl shadow-lg"
-          >
-            <div>
-              <label className="block text-gray-700 mb-2">Your Name</label>
-              <input
-                type="text"
-                name="name"
-                value={form.name}
-                onChange={handleChange}
-                placeholder="John Doe"
-                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
-                required
-              />
-            </div>
-            <div>
-              <label className="block text-gray-700 mb-2">Your Email</label>
-              <input
-                type="email"
-                name="email"
-                value={form.email}
-                onChange={handleChange}
-                placeholder="you@example.com"
-                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
-                required
-              />
-            </div>
-            <div>
-              <label className="block text-gray-700 mb-2">Message</label>
-              <textarea
-                name="message"
-                value={form.message}
-                onChange={handleChange}
-                placeholder="Write your message..."
-                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
-                rows="4"
-                required
-              />
-            </div>
-            <button
-              type="submit"
-              className="bg-blue-600 text-white py-2 rounded-lg hover:bg-blue-700 transition"
-            >
-              Send
-            </button>
-          </form>
-        </div>
-      );
-    }
-    """)
-          pages_added.add("Contact")
-
-           
-
-        if login and "Login" not in pages_added:
-          imports += "import Login from './pages/Login.jsx';\n"
-          routes_code += '<Route path="/login" element={<Login />} />\n'
-          page_files["src/pages/Login.jsx"] = dedent("""\
-    import React from 'react';
-
-    export default function Login() {
-      return (
-        <div className="flex flex-col items-center p-6">
-          <h2 className="text-2xl font-semibold mb-6">Login</h2>
-          <form className="w-full max-w-sm bg-white p-6 rounded-2xl shadow-lg space-y-4">
-            <div>
-              <label className="block text-gray-700 mb-2">Email</label>
-              <input
-                type="email"
-                placeholder="you@example.com"
-                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-green-500"
-              />
-            </div>
-            <div>
-              <label className="block text-gray-700 mb-2">Password</label>
-              <input
-                type="password"
-                placeholder="Enter your password"
-                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-green-500"
-              />
-            </div>
-            <button
-              type="submit"
-              className="w-full bg-green-600 text-white py-2 rounded-lg hover:bg-green-700 transition"
-            >
-              Login
-            </button>
-          </form>
-        </div>
-      );
+@st.cache_resource
+def _prompts():
+    # Built once per process. All static instructions live in the system messages, which stay
+    # byte-identical across calls so the provider can reuse its cached prefix; the user
+    # templates carry only the dynamic fields, with the long description last.
+    return {
+        "sys": {"role": "system", "content": dedent("""\
+            You are a frontend project generator. Output ONLY code blocks with file markers.
+            Format MUST be strictly:
+            --- filename.ext ---
+            (file contents)
+            --- end ---""")},
+        "user_tpl": dedent("""\
+            Generate a complete {framework} project.
+            {files_line}
+            User description:
+            \"\"\"{user_prompt}\"\"\"
+        """),
+        "file_sys": {"role": "system", "content": "You are a frontend project generator. Return only the raw contents of the requested file — no markers, no explanations."},
+        "file_tpl": dedent("""\
+            Write `{fname}`, part of a complete {framework} project made of: {plan}.
+            Together these files must be all that is needed to run the project locally.
+            User description:
+            \"\"\"{user_prompt}\"\"\"
+        """),
     }
-    """)
-          pages_added.add("Login")
-
-
-           
-
-        # Sidebar
-        if sidebar:
-            sidebar_code = dedent(f"""
-            <aside className="w-64 bg-gray-100 dark:bg-gray-800 p-4 hidden md:block">
-              <div className="text-xl font-bold mb-6">{title}</div>
-              <nav>
-                {"".join([f'<div className="mb-2"><Link to="{"/" if p.lower()=="home" else "/" + p.lower()}" className="block py-2 px-3 rounded hover:bg-gray-200 dark:hover:bg-gray-700">{p}</Link></div>' for p in pages])}
-              </nav>
-            </aside>
-            """)
-        else:
-            sidebar_code = ""  # no sidebar, content occupies full width
-
-        # Navbar
-        if navbar:
-            # If navbar_color is hex, apply inline style; else allow Tailwind class
-            if navbar_color.startswith("#"):
-                nav_style = f"style={{background: '{navbar_color}'}}"
-                nav_elem = dedent(f"""
-                <header className="flex items-center justify-between p-4" {nav_style}>
-                  <div className="flex items-center space-x-3">
-                    <div className="text-lg font-bold">{title}</div>
-                  </div>
-                  <div className="flex items-center space-x-3">
-                    <button onClick={{() => setDark(!dark)}} className="px-3 py-1 rounded bg-white text-black">Toggle theme</button>
-                  </div>
-                </header>
-                """)
-            else:
-                nav_elem = dedent(f"""
-                <header className="flex items-center justify-between p-4 {navbar_color} text-white">
-                  <div className="flex items-center space-x-3">
-                    <div className="text-lg font-bold">{title}</div>
-                  </div>
-                  <div className="flex items-center space-x-3">
-                    <button onClick={{() => setDark(!dark)}} className="px-3 py-1 rounded bg-white text-black">Toggle theme</button>
-                  </div>
-                </header>
-                """)
-            nav_code = nav_elem
-        else:
-            nav_code = ""
-
-        # Footer
-        if footer:
-            footer_code = dedent(f"""
-            <footer className="p-4 bg-gray-100 dark:bg-gray-900 text-sm text-center">
-              © {datetime.now().year} {title} — Generated by Website Builder Agent
-            </footer>
-            """)
-        else:
-            footer_code = ""
-
-        # Compose final App.jsx by replacing placeholders
-        final_app = app_template
-        final_app = final_app.replace("PLACEHOLDER_IMPORTS", imports)
-        final_app = final_app.replace("PLACEHOLDER_SIDEBAR", sidebar_code)
-        final_app = final_app.replace("PLACEHOLDER_NAV", nav_code)
-        final_app = final_app.replace("PLACEHOLDER_ROUTES", routes_code)
-        final_app = final_app.replace("PLACEHOLDER_FOOTER", footer_code)
-
-        files["src/App.jsx"] = dedent(final_app)
-
-        # Add page files
-        for path, content in page_files.items():
-            files[path] = content
-
-        # styles.css fallback (small)
-        files["src/styles.css"] = dedent("""/* Basic styles in case Tailwind not initialized yet */
-body { margin: 0; font-family: Arial, Helvetica, sans-serif; } .app { max-width: 1200px; margin: 0 auto; }""")
-
-        # Add README and setup scripts
-        files["README.md"] = dedent(f"# {title}\n\nGenerated by Website Builder Agent.\n\nRun `npm install` then `npm start` to view locally.")
-        files["setup.sh"] = dedent("""#!/usr/bin/env bash
-npm install
-npm run dev
-""")
-        files["setup.bat"] = dedent("""@echo off
-npm install
-npm start
-pause
-""")
-
-        # Static preview HTML for Streamlit: simple, reflects choices
-        preview_html = dedent(f"""<!DOCTYPE html>
-        <html lang="en">
-        <head>
-          <meta charset="UTF-8" />
-          <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-          <title>Preview - {title}</title>
-          <style>
-            body {{ font-family: Arial, Helvetica, sans-serif; padding: 24px; max-width: 1100px; margin:auto; }}
-            header {{ background:{navbar_color}; color: white; padding: 12px 18px; border-radius:6px; }}
-            aside {{ width:220px; float:left; margin-right:18px; background:#f2f2f2; padding:12px; border-radius:6px; }}
-            main {{ overflow:auto; }}
-            .card {{ padding:12px; border:1px solid #e6e6e6; border-radius:6px; margin-bottom:12px; }}
-          </style>
-        </head>
-        <body>
-          <header><h1>{title}</h1></header>
-          <div style="display:flex; gap:18px; margin-top:18px;">
-            {"<aside><nav>" + "".join([f"<div><a href='#'>{p}</a></div>" for p in pages]) + "</nav></aside>" if sidebar else ""}
-            <main style="flex:1;">
-              <div class="card"><h2>{pages[0]}</h2><p>Example content for {pages[0]} page.</p></div>
-              {"<div class='card'><h3>Charts</h3><p>Placeholder chart area</p></div>" if charts else ""}
-              {"<div class='card'><h3>Login</h3><p>Login page included</p></div>" if login else ""}
-            </main>
-          </div>
-        </body>
-        </html>""")
-        files["index_preview.html"] = preview_html
-
-        return files
 
+async def llm_generate(user_prompt: str, framework: str, router, prompts: dict, filenames=None):
+    # When filenames is given, several files are requested in one round trip.
+    # router/prompts come from the script thread: cache_resource needs its ScriptRunContext,
+    # which the event-loop thread running this coroutine does not have.
+    if filenames:
+        files_line = "Produce the following files, each wrapped in --- name --- / --- end ---: " + ", ".join(filenames)
     else:
-        # Static HTML/CSS generator for simple sites
-        pages = settings.get("pages", ["Home"])
-        title = settings.get("title", "My Site")
-        body_html = ""
-        for p in pages:
-            body_html += f"<section><h2>{p}</h2><p>Auto generated {p} page.</p></section>\n"
-        index_html = dedent(f"""<!doctype html>
-        <html>
-        <head>
-          <meta charset="utf-8"/>
-          <meta name="viewport" content="width=device-width,initial-scale=1">
-          <title>{title}</title>
-          <style>body{{font-family:Arial; padding:20px;}} header{{background:#222;color:#fff;padding:12px;border-radius:6px}}</style>
-        </head>
-        <body>
-          <header><h1>{title}</h1></header>
-          {body_html}
-        </body>
-        </html>""")
-        files["index.html"] = index_html
-        files["styles.css"] = "/* simple */"
-        return files
-
-# ---------------------
-# LLM Generator wrapper (keeps previous behaviour but now uses a composed prompt)
-# ---------------------
-def llm_generate(user_prompt: str, framework: str, model: str, api_key: str):
-    system_msg = {"role": "system", "content": "You are a frontend project generator. Output ONLY code blocks with file markers."}
-    user_msg = {"role": "user", "content": dedent(f"""
-        Generate a complete {framework} project.
-        Format MUST be strictly:
-        --- filename.ext ---
-        (file contents)
-        --- end ---
-        Provide all files to run the project locally.
-        User description:
-        \"\"\"{user_prompt}\"\"\" 
-    """)}
-    resp = completion(
-        model=model,
-        messages=[system_msg, user_msg],
+        files_line = "Provide all files to run the project locally."
+    p = prompts
+    user_msg = {"role": "user", "content": p["user_tpl"].format(framework=framework, files_line=files_line, user_prompt=user_prompt)}
+    # Non-blocking request; if stream=True is ever added, consume it with `async for`
+    resp = await router.acompletion(
+        model="default",
+        messages=[p["sys"], user_msg],
         temperature=0.2,
         max_tokens=4000,
-        api_key=api_key
     )
     text = resp["choices"][0]["message"]["content"]
     return safe_extract_code_blocks(text), text
 
+async def llm_generate_files(user_prompt: str, framework: str, router, prompts: dict, max_files_per_call: int = 1):
+    """
+    Ask for the files of FILE_PLAN[framework] concurrently, one request per file.
+    max_files_per_call > 1 groups files into shared requests (fewer calls under provider rate limits).
+    Returns: dict mapping filename -> file content
+    """
+    plan = FILE_PLAN.get(framework, FILE_PLAN["React + Tailwind"])
+
+    p = prompts
+
+    def msgs_for(fname):
+        return [
+            p["file_sys"],
+            {"role": "user", "content": p["file_tpl"].format(fname=fname, framework=framework, plan=", ".join(plan), user_prompt=user_prompt)},
+        ]
+
+    async def one_file(fname):
+        r = await router.acompletion(model="default", messages=msgs_for(fname), temperature=0.2, max_tokens=1500)
+        return {fname: strip_code_fence(r["choices"][0]["message"]["content"])}
+
+    async def batch_of_files(batch):
+        batch_files, _ = await llm_generate(user_prompt, framework, router, prompts, filenames=batch)
+        # Fences can also appear inside the --- name --- blocks
+        return {fname: strip_code_fence(content) for fname, content in batch_files.items()}
+
+    n = max(1, max_files_per_call)
+    batches = [plan[i:i + n] for i in range(0, len(plan), n)]
+    results = await asyncio.gather(*(
+        one_file(b[0]) if len(b) == 1 else batch_of_files(b)
+        for b in batches
+    ))
+    files = {}
+    for r in results:
+        files.update(r)
+    return files
+
+def _llm_cache_path(*parts: str) -> Path:
+    key = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return LLM_CACHE_DIR / f"{key}.json"
+
+def _prune_llm_cache():
+    # Drops expired entries and the oldest ones beyond LLM_CACHE_MAX_ENTRIES
+    now = time.time()
+    entries = []
+    for p in LLM_CACHE_DIR.glob("*.json"):
+        try:
+            entries.append((p.stat().st_mtime, p))
+        except OSError:
+            pass  # removed concurrently
+    entries.sort(reverse=True)
+    for i, (mtime, p) in enumerate(entries):
+        if i >= LLM_CACHE_MAX_ENTRIES or now - mtime > LLM_CACHE_TTL:
+            p.unlink(missing_ok=True)
+
+def generate_files(user_prompt: str, framework: str, model: str, max_files_per_call: int, api_key: str,
+                   use_disk_cache: bool = True, persist: bool = True):
+    # On-disk cache so a response survives restarts and new sessions; a bypassed lookup still refreshes the entry.
+    # persist=False (project saving is off) keeps the response out of output/ entirely.
+    cache_file = _llm_cache_path(user_prompt, framework, model, str(max_files_per_call))
+    if use_disk_cache:
+        try:
+            # Entries older than the TTL are misses, so the in-memory expiry really refreshes the response
+            if time.time() - cache_file.stat().st_mtime <= LLM_CACHE_TTL:
+                data = cache_file.read_bytes()
+                return orjson.loads(data) if orjson is not None else json.loads(data)
+        except (OSError, ValueError):
+            pass  # missing, unreadable or corrupt entry: treat as a miss, it is overwritten below
+    # Cached resources are resolved here, on the script thread, and handed to the coroutines
+    files = run_async(llm_generate_files(user_prompt, framework, _router(model, api_key), _prompts(), max_files_per_call))
+    if files and persist:
+        LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Written to a temp file and renamed into place, so a crash or a concurrent session
+        # can never leave a truncated entry behind
+        fd, tmp_path = tempfile.mkstemp(dir=LLM_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(files) if orjson is not None else json.dumps(files).encode("utf-8"))
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _prune_llm_cache()
+    return files
+
+@st.cache_data(ttl=LLM_CACHE_TTL, max_entries=256, show_spinner=False)
+def cached_generate_files(user_prompt: str, framework: str, model: str, max_files_per_call: int, _api_key: str, persist: bool = True):
+    # Identical (prompt, framework, model) inputs reuse the previous response; the key is not part of the cache key.
+    return generate_files(user_prompt, framework, model, max_files_per_call, _api_key, persist=persist)
+
+def _notify(kind: str, msg: str):
+    # st.<kind>(msg), also recorded for the post-generation redraw (see the generate block)
+    getattr(st, kind)(msg)
+    st.session_state.setdefault("gen_notices", []).append((kind, msg))
+
+def _settings_key(settings: dict) -> tuple:
+    # Hashable, order-independent form of the answers (pages list -> tuple)
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in settings.items()))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_mock_generator(settings_key: tuple, framework: str) -> dict:
+    # The mock output is fully determined by the answers, so a repeated configuration skips regeneration
+    settings = {k: list(v) if isinstance(v, tuple) else v for k, v in settings_key}
+    return mock_generator_from_settings(settings, framework)
+
 # ---------------------
 # Streamlit UI + Q&A flow
 # ---------------------
@@ -561,9 +266,18 @@ if "qa_answers" not in st.session_state:
 if "qa_advanced" not in st.session_state:
     st.session_state.qa_advanced = False
 
-with st.sidebar:
-    st.header("Agent conversation")
-    st.write("Answer a few questions and the agent will generate a website for you.")
+@st.cache_resource
+def _env():
+    # Probed once per server process instead of on every widget click
+    return {
+        "litellm": importlib.util.find_spec("litellm") is not None,  # no import needed to know it is installed
+        "key": st.secrets.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY"),
+        "output_root": OUTPUT_ROOT.resolve(),
+    }
+
+# Runs as a fragment: Next/Back clicks only rerun the question flow, not the whole page
+@st.fragment
+def qa_flow():
     # Define the question flow
     step = st.session_state.qa_step
     answers = st.session_state.qa_answers
@@ -575,6 +289,11 @@ with st.sidebar:
         if st.session_state.qa_step > 0:
             st.session_state.qa_step -= 1
 
+    def start_generation():
+        # Runs before the rerun it triggers, so the button is already drawn disabled while that run generates
+        st.session_state.generating = True
+        st.session_state.generate_trigger = time.time()
+
     # Step 0: Title
     if step == 0:
         title_in = st.text_input("1) Website name/title", value=answers.get("title", "My Site"))
@@ -692,31 +411,48 @@ with st.sidebar:
         # Still keep full JSON for debugging
         st.json(st.session_state.qa_answers)
 
-        if st.button("Generate site now"):
-            # Move to main area trigger
-            st.session_state.generate_trigger = datetime.now().timestamp()
+        if st.button("Generate site now", disabled=st.session_state.get("generating", False), on_click=start_generation):
+            st.rerun()  # full-app rerun so the main area picks up the trigger
         if st.button("Back"):
             go_back()
 
+    # Drawn inside the fragment so it follows each answer; the main area only reruns on full runs
+    with st.expander("Current answers"):
+        st.write(st.session_state.qa_answers)
+
+with st.sidebar:
+    st.header("Agent conversation")
+    st.write("Answer a few questions and the agent will generate a website for you.")
+    qa_flow()
+
 # Main area: show conversation summary and handle generation
 col1, col2 = st.columns([2, 1])
 with col1:
     st.header("Conversation preview")
-    st.write("The agent will ask questions in the sidebar. When finished, click 'Generate site now'.")
-    st.write("Current answers:")
-    st.write(st.session_state.qa_answers)
+    st.write("The agent will ask questions in the sidebar (your current answers are listed there). When finished, click 'Generate site now'.")
 
     # If generation triggered, build settings and call generator
     # Collect inputs from user (always visible in sidebar or main app)
     st.session_state.qa_answers["contact"] = st.checkbox("Include Contact Page?", value=False)
     st.session_state.qa_answers["about"] = st.checkbox("Include About Page?", value=False)
     st.session_state.qa_answers["login"] = st.checkbox("Include Login Page?", value=False)
+    # The ZIP is built from memory; writing the folder (and the LLM response cache) is only needed on the server
+    save_to_disk = st.checkbox("Also save the project folder and LLM response cache under output/", value=True)
     pages = st.session_state.qa_answers.get("pages", [])
     if not pages:
        pages = ["Home"]
     st.session_state.qa_answers["pages"] = pages
     if st.session_state.get("generate_trigger"):
+        # Set by the button callback: this run generates, then reruns once (redraw_only) so the
+        # sidebar button, drawn disabled above, is drawn enabled again with the stored outcome
+        generated_now = st.session_state.get("generating", False)
+        redraw = st.session_state.pop("redraw_only", False)
         st.info("Building site from your answers...")
+        # Messages from the generating run are replayed by its redraw, which would otherwise drop them
+        notices = st.session_state.pop("gen_notices", [])
+        if redraw:
+            for kind, msg in notices:
+                getattr(st, kind)(msg)
         settings = {
             "title": st.session_state.qa_answers.get("title", "My Site"),
             "navbar": st.session_state.qa_answers.get("navbar", True),
@@ -741,69 +477,112 @@ with col1:
 
         try:
             # Use LLM if requested and available, else mock generator
-            if st.session_state.qa_answers.get("framework") and st.session_state.qa_answers.get("framework").lower().startswith("react") and st.sidebar.checkbox("Use Groq LLM (generate with model)", value=False):
-                # If user wants to use the LLM, compose a single prompt
-                combined_prompt = f"""Create a complete {framework} project with the following settings:
-Title: {settings['title']}
-Navbar: {settings['navbar']} (color: {settings['navbar_color']})
-Sidebar: {settings['sidebar']}
-Pages: {', '.join(settings['pages'])}
-Footer: {settings['footer']}
-Login page: {settings['login']}
-Charts: {settings['charts']}
-Theme: {settings['theme']}
-Custom color: {settings['custom_color']}
-Provide all files with markers like --- filename --- (file contents) --- end ---.
-"""
-                GROQ_API_KEY = st.secrets.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY")
+            use_llm = bool(st.session_state.qa_answers.get("framework") and st.session_state.qa_answers.get("framework").lower().startswith("react") and st.sidebar.checkbox("Use Groq LLM (generate with model)", value=False))
+            if use_llm:
                 model = st.sidebar.selectbox("Groq model", DEFAULT_GROQ_MODELS)
-                if not GROQ_API_KEY:
-                    st.warning("No API key found — falling back to local mock generator.")
-                    files_dict = mock_generator_from_settings(settings, framework)
+                max_files_per_call = st.sidebar.number_input("Files per LLM call (raise if rate limited)", min_value=1, max_value=5, value=1)
+
+            # Reruns and double-clicks with unchanged answers reuse the last result instead of regenerating
+            gen_key = hashlib.blake2b(repr((sorted(settings.items()), framework, use_llm and (model, max_files_per_call), save_to_disk)).encode(), digest_size=12).hexdigest()
+            gen_cache = st.session_state.setdefault("gen_cache", {})
+            # ?nocache=1 forces a fresh generation past every cache layer
+            nocache = st.query_params.get("nocache") == "1"
+            try:
+                if gen_key in gen_cache and (not nocache or redraw):
+                    # Re-inserted so the dict stays ordered oldest -> most recently used
+                    gen_cache[gen_key] = gen_cache.pop(gen_key)
+                    files_dict, encoded, project_folder = gen_cache[gen_key]
+                elif redraw:
+                    # The generation behind this redraw failed; report it instead of generating again
+                    files_dict, encoded, project_folder = {}, {}, None
                 else:
-                    files_dict, raw_text = llm_generate(combined_prompt, framework, model, GROQ_API_KEY)
-            else:
-                files_dict = mock_generator_from_settings(settings, framework)
+                    if use_llm:
+                        # If user wants to use the LLM, compose a single prompt
+                        combined_prompt = COMBINED_PROMPT.substitute(settings, framework=framework, pages=", ".join(settings["pages"]))
+                        GROQ_API_KEY = _env()["key"]
+                        if not GROQ_API_KEY:
+                            _notify("warning", "No API key found — falling back to local mock generator.")
+                            files_dict = cached_mock_generator(_settings_key(settings), framework)
+                        elif _litellm_router_cls() is None:
+                            _notify("warning", "litellm is not installed — falling back to local mock generator.")
+                            files_dict = cached_mock_generator(_settings_key(settings), framework)
+                        elif nocache:
+                            files_dict = generate_files(combined_prompt, framework, model, int(max_files_per_call), GROQ_API_KEY, use_disk_cache=False, persist=save_to_disk)
+                            # Drop the in-memory responses too, or a later normal run would still serve the old one;
+                            # other entries reload from the disk cache
+                            cached_generate_files.clear()
+                        else:
+                            files_dict = cached_generate_files(combined_prompt, framework, model, int(max_files_per_call), GROQ_API_KEY, persist=save_to_disk)
+                    else:
+                        files_dict = cached_mock_generator(_settings_key(settings), framework)
+
+                    encoded = encode_files(files_dict) if files_dict else {}
+                    project_folder = None
+                    if files_dict and save_to_disk:
+                        # Folder is keyed by the inputs; .done records the content digest of the last complete
+                        # write, so the folder is only reused when it holds exactly what is being downloaded
+                        project_folder = OUTPUT_ROOT / f"generated_frontend_{gen_key}"
+                        done_marker = project_folder / ".done"
+                        digest = files_digest(encoded)
+                        if done_marker.exists() and done_marker.read_text(encoding="utf-8") == digest:
+                            _notify("info", "An identical project is already on disk; reusing it.")
+                        else:
+                            # Files left by an earlier write of this folder (a regenerated response can have a
+                            # different file set) are pruned so the folder matches the ZIP
+                            previous = {p for p in project_folder.rglob("*") if p.is_file()} if project_folder.exists() else set()
+                            written = write_files(project_folder, encoded)
+                            for stale in previous - set(written) - {done_marker}:
+                                stale.unlink(missing_ok=True)
+                            done_marker.write_text(digest, encoding="utf-8")
+                            _notify("markdown", "**Saved:**\n" + "\n".join(f"- `{p}`" for p in written))
+                    if files_dict:
+                        gen_cache[gen_key] = (files_dict, encoded, project_folder)
+                        # Small LRU: only the most recent results are kept for the session
+                        while len(gen_cache) > GEN_CACHE_SIZE:
+                            gen_cache.pop(next(iter(gen_cache)))
+            finally:
+                # Cleared only once the result is stored (or generation failed)
+                st.session_state.generating = False
 
             if not files_dict:
                 st.error("No files were generated.")
             else:
-                project_folder = timestamped_folder(OUTPUT_ROOT, "generated_frontend")
-                if project_folder.exists():
-                    shutil.rmtree(project_folder)
-                project_folder.mkdir(parents=True, exist_ok=True)
-
-                for fname, content in files_dict.items():
-                    file_path = project_folder / fname
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
-                    # If content is not string (like bytes), convert to str
-                    if isinstance(content, bytes):
-                        file_path.write_bytes(content)
-                    else:
-                        file_path.write_text(content, encoding="utf-8")
-                    st.write(f"Saved: `{file_path}`")
-
-                zip_path = project_folder.with_suffix(".zip")
-                make_zip_from_folder(project_folder, zip_path)
+                zip_bytes = make_zip_from_files(encoded)
 
                 st.success("Generation complete!")
-                st.markdown(f"**Project folder:** `{project_folder}`")
-                st.download_button("Download project ZIP", data=zip_path.read_bytes(), file_name=zip_path.name, mime="application/zip")
+                if project_folder:
+                    st.markdown(f"**Project folder:** `{project_folder}`")
+                zip_name = f"{project_folder.name}.zip" if project_folder else "generated_frontend.zip"
+                st.download_button("Download project ZIP", data=zip_bytes, file_name=zip_name, mime="application/zip")
 
                 st.subheader("Files generated")
-                for f in sorted([p.relative_to(project_folder) for p in project_folder.rglob('*') if p.is_file()]):
-                    st.code(str(f), language="")
-
-                preview_file = project_folder / "index_preview.html" if (project_folder / "index_preview.html").exists() else project_folder / "index.html"
-                if preview_file.exists():
+                # The files were just written from files_dict, so list its keys instead of walking the folder
+                st.code("\n".join(sorted(files_dict)), language="")
+
+                # Preview straight from the generated content; no need to read it back from disk
+                preview_name = next((n for n in ("index_preview.html", "index.html") if files_dict.get(n)), None)
+                preview_html = files_dict[preview_name] if preview_name else None
+                if preview_name and len(encoded[preview_name]) > PREVIEW_MAX_BYTES:
+                    # A pathological model output would otherwise be shipped inline to the browser
+                    st.warning("Preview too large to render; download the ZIP instead.")
+                    preview_html = None
+                elif isinstance(preview_html, bytes):
+                    preview_html = preview_html.decode("utf-8", "replace")
+                st.session_state["preview_html"] = preview_html
+                if preview_html:
                     st.subheader("Live preview")
-                    html_content = preview_file.read_text(encoding="utf-8")
-                    st.components.v1.html(html_content, height=600, scrolling=True)
-                else:
+                    st.components.v1.html(st.session_state["preview_html"], height=600, scrolling=True)
+                elif preview_name is None:
                     st.info("No preview available.")
 
         except Exception as e:
-            st.error(f"Error during generation: {e}")
+            st.session_state.generating = False
+            _notify("error", f"Error during generation: {e}")
+
+        # Outside the try: st.rerun() works by raising, so it must not pass through `except Exception`
+        if generated_now:
+            st.session_state.redraw_only = True
+            st.rerun()
 
 with col2:
     st.header("Quick actions / Tips")
@@ -817,10 +596,10 @@ with col2:
     """)
     st.markdown("---")
     st.write("Debug / environment")
-    st.write(f"litellm available: {LITELLM_AVAILABLE}")
-    GROQ_API_KEY = st.secrets.get("GROQ_API_KEY") or os.environ.get("GROQ_API_KEY")
+    st.write(f"litellm available: {_env()['litellm']}")
+    GROQ_API_KEY = _env()["key"]
     st.write(f"Groq API key present: {'yes' if GROQ_API_KEY else 'no'}")
-    st.write(f"Output root: `{OUTPUT_ROOT.resolve()}`")
+    st.write(f"Output root: `{_env()['output_root']}`")
 
 st.markdown("---")
 st.caption("Generated projects are saved in the `output/` folder. Keep your API keys secure.")
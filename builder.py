@@ -0,0 +1,665 @@
+import io
+import re
+import hashlib
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from textwrap import dedent
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used when it is missing
+    orjson = None
+
+# ---------------------
+# Configuration
+# ---------------------
+# Case-insensitive search, so the HTML fallback never builds a lowercased copy of the response.
+# A real document opens with its doctype/<html> tag, so only the head of the response is scanned.
+_HTML_SNIFF = re.compile(r"<html|<!doctype html", re.IGNORECASE)
+HTML_SNIFF_WINDOW = 4096
+
+# ---------------------
+# Utilities
+# ---------------------
+WRITE_BUFSIZE = 64 * 1024
+WRITE_WORKERS = 8
+
+def encode_files(files: dict) -> dict:
+    # Encode each file once; the same bytes feed both the disk write and the ZIP entry
+    return {fname: content if isinstance(content, bytes) else content.encode("utf-8") for fname, content in files.items()}
+
+def files_digest(files: dict) -> str:
+    # Content fingerprint of an encoded project, independent of dict order
+    h = hashlib.sha256()
+    for fname in sorted(files):
+        data = files[fname]
+        h.update(f"{fname}\0{len(data)}\0".encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+def _write_one(file_path: Path, content):
+    data = content if isinstance(content, bytes) else content.encode("utf-8")
+    with open(file_path, "wb", buffering=WRITE_BUFSIZE) as f:
+        f.write(data)
+    return file_path
+
+def write_files(folder: Path, files: dict):
+    # Create each distinct parent directory once, then write the files in parallel
+    # (independent I/O; the GIL is released while the OS writes)
+    for parent in {(folder / fname).parent for fname in files}:
+        parent.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as ex:
+        return list(ex.map(lambda item: _write_one(folder / item[0], item[1]), files.items()))
+
+# Tiny projects are stored as-is, typical (small, text-only) ones get fast deflate,
+# and the full level is only used once size starts to matter
+ZIP_STORE_LIMIT = 64 * 1024
+ZIP_FAST_LIMIT = 256 * 1024
+
+def make_zip_from_files(files: dict, compresslevel=None) -> bytes:
+    # Build the archive in memory from the generated content (no temp file, no read-back).
+    # compresslevel forces a deflate level; by default it is picked from the payload size.
+    import zipfile  # only needed once a project is generated, not on every page load
+    total_bytes = sum(len(content) for content in files.values())
+    if compresslevel is not None:
+        compression, level = zipfile.ZIP_DEFLATED, compresslevel
+    elif total_bytes < ZIP_STORE_LIMIT:
+        compression, level = zipfile.ZIP_STORED, None
+    else:
+        compression, level = zipfile.ZIP_DEFLATED, 1 if total_bytes < ZIP_FAST_LIMIT else 6
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression, compresslevel=level) as zf:
+        # Sorted entries with the fixed ZipInfo timestamp make identical projects zip to identical bytes
+        for fname in sorted(files):
+            content = files[fname]
+            zinfo = zipfile.ZipInfo(fname)
+            zinfo.external_attr = 0o600 << 16  # same permissions writestr(name, ...) would use
+            data = content if isinstance(content, bytes) else content.encode("utf-8")
+            zf.writestr(zinfo, data, compress_type=compression, compresslevel=level)
+    return buf.getvalue()
+
+def _marker_name(line: str):
+    # "--- src/App.jsx ---" -> "src/App.jsx"; None for lines that are not a file marker
+    stripped = line.strip()
+    if len(stripped) < 7 or not stripped.startswith("---") or not stripped.endswith("---"):
+        return None
+    return stripped[3:-3].strip() or None
+
+def strip_code_fence(text: str) -> str:
+    # Models often wrap a single requested file in ```lang ... ``` despite being told not to;
+    # unwrap one fence around the whole response, anything else is only stripped
+    text = text.strip()
+    if len(text) >= 6 and text.startswith("```") and text.endswith("```"):
+        nl = text.find("\n")
+        if nl != -1 and text.find("```", nl + 1) == len(text) - 3:
+            return text[nl + 1:-3].strip()
+    return text
+
+def safe_extract_code_blocks(text: str):
+    # Line-based scanners (linear in the response size) instead of backtracking DOTALL regexes
+    files = {}
+    lines = text.splitlines(keepends=True)
+
+    # Try --- filename --- ... --- end --- blocks
+    current, body = None, []
+    for line in lines:
+        name = _marker_name(line) if line.lstrip().startswith("---") else None
+        if current is None:
+            if name and name.lower() != "end":
+                current, body = name, []
+        elif name and name.lower() == "end":
+            files[current] = "".join(body).strip()
+            current = None
+        else:
+            body.append(line)
+    if files:
+        return files
+
+    # Fallback: markdown-style codeblocks. The fences are fixed strings, so str.find
+    # (C-level substring search) walks the text once: open fence, end of its info line, close fence.
+    pos, i = 0, 1
+    while True:
+        start = text.find("```", pos)
+        if start == -1:
+            break
+        nl = text.find("\n", start + 3)
+        if nl == -1:
+            break
+        end = text.find("```", nl + 1)
+        if end == -1:
+            break
+        files[f"file_{i}.txt"] = text[nl + 1:end].strip()
+        i, pos = i + 1, end + 3
+    if files:
+        return files
+
+    # Fallback: HTML detection
+    if _HTML_SNIFF.search(text, 0, HTML_SNIFF_WINDOW):
+        files["index.html"] = text.strip()
+
+    return files
+
+# ---------------------
+# Static mock templates (dedented once at import, reused on every generation)
+# ---------------------
+def _dumps_compact(obj) -> str:
+    # npm does not care about indentation, so generated JSON is written compact
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+# package.json never depends on the settings, so it is serialized once
+_PACKAGE_JSON = _dumps_compact({
+    "name": "generated-frontend",
+    "version": "1.0.0",
+    "private": True,
+    "scripts": {
+        "start": "vite",
+        "dev": "vite",
+        "build": "vite build"
+    },
+    "dependencies": {
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0",
+        "react-router-dom": "^6.14.1"
+    },
+    "devDependencies": {
+        "vite": "^4.5.0",
+        "tailwindcss": "^3.5.0",
+        "postcss": "^8.4.0",
+        "autoprefixer": "^10.4.0"
+    }
+})
+
+_INDEX_HTML = dedent("""<!DOCTYPE html>
+        <html lang="en">
+        <head>
+          <meta charset="UTF-8" />
+          <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+          <title>Generated React App</title>
+        </head>
+        <body>
+          <div id="root"></div>
+          <script type="module" src="/src/main.jsx"></script>
+        </body>
+        </html>""")
+
+_TAILWIND_CONFIG = dedent("""module.exports = {
+  content: ["./index.html", "./src/**/*.{js,jsx}"],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+}""")
+
+_POSTCSS_CONFIG = dedent("""module.exports = {
+  plugins: {
+    tailwindcss: {},
+    autoprefixer: {},
+  }
+}""")
+
+_INDEX_CSS = dedent("""@tailwind base;
+@tailwind components;
+@tailwind utilities;
+
+/* custom global styles */
+body { @apply bg-white text-gray-900; }
+.dark body { @apply bg-gray-900 text-gray-100; }""")
+
+_MAIN_JSX = dedent("""import React from 'react';
+import { createRoot } from 'react-dom/client';
+import { BrowserRouter as Router } from 'react-router-dom';
+import App from './App.jsx';
+import './index.css';
+createRoot(document.getElementById('root')).render(
+  <React.StrictMode>
+    <Router>
+      <App />
+    </Router>
+  </React.StrictMode>
+);""")
+
+_STYLES_CSS = dedent("""/* Basic styles in case Tailwind not initialized yet */
+body { margin: 0; font-family: Arial, Helvetica, sans-serif; } .app { max-width: 1200px; margin: 0 auto; }""")
+
+_SETUP_SH = dedent("""#!/usr/bin/env bash
+npm install
+npm run dev
+""")
+
+_SETUP_BAT = dedent("""@echo off
+npm install
+npm start
+pause
+""")
+
+_ABOUT_JSX = dedent("""\
+            import React from 'react';
+            export default function About() {
+              return (
+                <div>
+                  <h2 className="text-2xl font-semibold mb-4">About Us</h2>
+                  <p>Welcome to our website! This is the about page.</p>
+                </div>
+              );
+            }
+            """)
+
+_CONTACT_JSX = dedent("""\
+    import React, { useState } from 'react';
+
+    export default function Contact() {
+      const [form, setForm] = useState({ name: "", email: "", message: "" });
+
+      const handleChange = (e) => {
+        setForm({ ...form, [e.target.name]: e.target.value });
+      };
+
+      const handleSubmit = (e) => {
+        e.preventDefault();
+        alert(`Message sent!\\nName: ${form.name}\\nEmail: ${form.email}\\nMessage: ${form.message}`);
+        setForm({ name: "", email: "", message: "" }); // reset
+      };
+
+      return (
+        <div className="flex flex-col items-center p-6">
+          <h2 className="text-2xl font-semibold mb-6">Contact Us</h2>
+          <form
+            onSubmit={handleSubmit}
+            className="flex flex-col space-y-4 w-full max-w-md bg-white p-6 rounded-2xl shadow-lg"
+          >
+            <div>
+              <label className="block text-gray-700 mb-2">Your Name</label>
+              <input
+                type="text"
+                name="name"
+                value={form.name}
+                onChange={handleChange}
+                placeholder="John Doe"
+                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                required
+              />
+            </div>
+            <div>
+              <label className="block text-gray-700 mb-2">Your Email</label>
+              <input
+                type="email"
+                name="email"
+                value={form.email}
+                onChange={handleChange}
+                placeholder="you@example.com"
+                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                required
+              />
+            </div>
+            <div>
+              <label className="block text-gray-700 mb-2">Message</label>
+              <textarea
+                name="message"
+                value={form.message}
+                onChange={handleChange}
+                placeholder="Write your message..."
+                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+                rows="4"
+                required
+              />
+            </div>
+            <button
+              type="submit"
+              className="bg-blue-600 text-white py-2 rounded-lg hover:bg-blue-700 transition"
+            >
+              Send
+            </button>
+          </form>
+        </div>
+      );
+    }
+    """)
+
+_LOGIN_JSX = dedent("""\
+    import React from 'react';
+
+    export default function Login() {
+      return (
+        <div className="flex flex-col items-center p-6">
+          <h2 className="text-2xl font-semibold mb-6">Login</h2>
+          <form className="w-full max-w-sm bg-white p-6 rounded-2xl shadow-lg space-y-4">
+            <div>
+              <label className="block text-gray-700 mb-2">Email</label>
+              <input
+                type="email"
+                placeholder="you@example.com"
+                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-green-500"
+              />
+            </div>
+            <div>
+              <label className="block text-gray-700 mb-2">Password</label>
+              <input
+                type="password"
+                placeholder="Enter your password"
+                className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-green-500"
+              />
+            </div>
+            <button
+              type="submit"
+              className="w-full bg-green-600 text-white py-2 rounded-lg hover:bg-green-700 transition"
+            >
+              Login
+            </button>
+          </form>
+        </div>
+      );
+    }
+    """)
+
+# App.jsx skeleton; PLACEHOLDER_* markers are filled per generation (plain string, no f-string).
+# Sidebar/nav/footer markers sit flush-left since those fragments carry their own layout.
+_APP_JSX_TEMPLATE = """
+import React, { useState } from 'react';
+import { Routes, Route, Link } from 'react-router-dom';
+PLACEHOLDER_IMPORTS
+
+export default function App() {
+  const [dark, setDark] = useState(false);
+  return (
+    <div className={dark ? 'dark' : ''}>
+      <div className="min-h-screen flex">
+PLACEHOLDER_SIDEBAR
+        <div className="flex-1 flex flex-col">
+PLACEHOLDER_NAV
+          <main className="p-6 flex-1">
+            <Routes>
+              PLACEHOLDER_ROUTES
+            </Routes>
+          </main>
+PLACEHOLDER_FOOTER
+        </div>
+      </div>
+    </div>
+  );
+}
+"""
+# All App.jsx placeholders are filled in one pass over the template
+_APP_PLACEHOLDER = re.compile(r"PLACEHOLDER_(IMPORTS|SIDEBAR|NAV|ROUTES|FOOTER)")
+
+# ---------------------
+# Mock generator (creates a real React + Tailwind project or static HTML)
+# ---------------------
+# Footer year, read once per process rather than on every generation
+_CURRENT_YEAR = datetime.now().year
+
+def _render_page(info: tuple, charts: bool) -> str:
+    p, lp, comp_name, _ = info
+    # The extra line carries its own indent so an empty one stays a bare blank line
+    extra = ""
+    if charts and lp in ("analytics", "dashboard", "home"):
+        extra = "      <div className='mt-4 p-4 border rounded'>[Chart placeholder — replace with real chart]</div>"
+    return f"""
+import React from 'react';
+export default function {comp_name}() {{
+  return (
+    <div>
+      <h2 className="text-2xl font-semibold mb-4">{p}</h2>
+      <p>This is the {p} page generated by the Website Builder Agent.</p>
+{extra}
+    </div>
+  );
+}}
+"""
+
+def mock_generator_from_settings(settings: dict, framework: str):
+    """
+    settings: dict containing
+      - title: str
+      - navbar: bool
+      - navbar_color: str (like 'bg-brown-700' or hex)
+      - sidebar: bool
+      - pages: list of page names (strings)
+      - advanced: bool
+      - footer: bool
+      - login: bool
+      - charts: bool
+      - theme: 'light'|'dark'|'custom'
+      - custom_color: str
+    framework: "React + Tailwind" or "Static HTML/CSS"
+    """
+    title = settings.get("title", "My Site")
+    navbar = settings.get("navbar", True)
+    navbar_color = settings.get("navbar_color", "#5B2E0F")
+    sidebar = settings.get("sidebar", True)
+    pages = settings.get("pages", ["Home"])
+    footer = settings.get("footer", False)
+    login = settings.get("login", False)
+    charts = settings.get("charts", False)
+    theme = settings.get("theme", "light")
+    custom_color = settings.get("custom_color", "#5B2E0F")
+    about = settings.get("about", False)
+    contact = settings.get("contact", False)
+
+
+    files = {}
+
+    if "react" in framework.lower():
+        # package.json (include both start and dev for convenience)
+        files["package.json"] = _PACKAGE_JSON
+
+        # Vite index.html (entry)
+        files["index.html"] = _INDEX_HTML
+
+        # tailwind config (simple)
+        files["tailwind.config.cjs"] = _TAILWIND_CONFIG
+
+        files["postcss.config.cjs"] = _POSTCSS_CONFIG
+
+        # src/index.css (Tailwind directives)
+        files["src/index.css"] = _INDEX_CSS
+
+        # src/main.jsx
+        files["src/main.jsx"] = _MAIN_JSX
+
+        # Create imports, sidebar, nav, routes, footer based on settings
+        # Collected as lists and joined once, instead of growing strings per page
+        imports_parts: list[str] = []
+        routes_parts: list[str] = []
+        sidebar_code = ""
+        nav_code = ""
+        footer_code = ""
+
+        # (name, lowercased name, component name, route path) per page, computed once
+        page_infos = [
+            (p, lp, ''.join(word.capitalize() for word in p.split()), "/" if lp == "home" else "/" + lp.replace(" ", "-"))
+            for p, lp in ((p, p.lower()) for p in pages)
+        ]
+
+        # Plain string formatting holds the GIL, so a thread pool would only add overhead here
+        rendered = [_render_page(info, charts) for info in page_infos]
+
+        # Pages components, imports, routes and sidebar links in a single pass
+        page_files = {}
+        sidebar_parts: list[str] = []
+        for (p, lp, comp_name, route_path), page_src in zip(page_infos, rendered):
+            page_files[f"src/pages/{comp_name}.jsx"] = page_src
+
+            # import line for the page in App
+            imports_parts.append(f"import {comp_name} from './pages/{comp_name}.jsx';\n")
+
+            # route entry
+            route_code = '<Route path="' + route_path + '" element={' + '<' + comp_name + ' />' + '} />\n'
+            routes_parts.append(route_code)
+
+            if sidebar:
+                sidebar_parts.append(f'<div className="mb-2"><Link to="{route_path}" className="block py-2 px-3 rounded hover:bg-gray-200 dark:hover:bg-gray-700">{p}</Link></div>')
+
+        # Track already-added pages
+        # ------------------------------
+        pages_added = set(pages)  # start with whatever user gave
+
+        # ------------------------------
+        # Extra pages: About, Contact, Login
+        # ------------------------------
+        if settings.get("about") and "About" not in pages_added:
+            imports_parts.append("import About from './pages/About.jsx';\n")
+            routes_parts.append('<Route path="/about" element={<About />} />\n')
+            page_files["src/pages/About.jsx"] = _ABOUT_JSX
+            pages_added.add("About")
+
+        if settings.get("contact") and "Contact" not in pages_added:
+          imports_parts.append("import Contact from './pages/Contact.jsx';\n")
+          routes_parts.append('<Route path="/contact" element={<Contact />} />\n')
+          page_files["src/pages/Contact.jsx"] = _CONTACT_JSX
+          pages_added.add("Contact")
+
+           
+
+        if login and "Login" not in pages_added:
+          imports_parts.append("import Login from './pages/Login.jsx';\n")
+          routes_parts.append('<Route path="/login" element={<Login />} />\n')
+          page_files["src/pages/Login.jsx"] = _LOGIN_JSX
+          pages_added.add("Login")
+
+
+           
+
+        # Sidebar
+        if sidebar:
+            sidebar_links = "".join(sidebar_parts)
+            sidebar_code = f"""
+<aside className="w-64 bg-gray-100 dark:bg-gray-800 p-4 hidden md:block">
+  <div className="text-xl font-bold mb-6">{title}</div>
+  <nav>
+    {sidebar_links}
+  </nav>
+</aside>
+"""
+        else:
+            sidebar_code = ""  # no sidebar, content occupies full width
+
+        # Navbar
+        if navbar:
+            # If navbar_color is hex, apply inline style; else allow Tailwind class
+            if navbar_color.startswith("#"):
+                nav_style = f"style={{background: '{navbar_color}'}}"
+                nav_elem = f"""
+<header className="flex items-center justify-between p-4" {nav_style}>
+  <div className="flex items-center space-x-3">
+    <div className="text-lg font-bold">{title}</div>
+  </div>
+  <div className="flex items-center space-x-3">
+    <button onClick={{() => setDark(!dark)}} className="px-3 py-1 rounded bg-white text-black">Toggle theme</button>
+  </div>
+</header>
+"""
+            else:
+                nav_elem = f"""
+<header className="flex items-center justify-between p-4 {navbar_color} text-white">
+  <div className="flex items-center space-x-3">
+    <div className="text-lg font-bold">{title}</div>
+  </div>
+  <div className="flex items-center space-x-3">
+    <button onClick={{() => setDark(!dark)}} className="px-3 py-1 rounded bg-white text-black">Toggle theme</button>
+  </div>
+</header>
+"""
+            nav_code = nav_elem
+        else:
+            nav_code = ""
+
+        # Footer
+        if footer:
+            footer_code = f"""
+<footer className="p-4 bg-gray-100 dark:bg-gray-900 text-sm text-center">
+  © {_CURRENT_YEAR} {title} — Generated by Website Builder Agent
+</footer>
+"""
+        else:
+            footer_code = ""
+
+        imports = "".join(imports_parts)
+        routes_code = "".join(routes_parts)
+
+        # Compose final App.jsx by replacing placeholders
+        subs = {
+            "IMPORTS": imports,
+            "SIDEBAR": sidebar_code,
+            "NAV": nav_code,
+            "ROUTES": routes_code,
+            "FOOTER": footer_code,
+        }
+        final_app = _APP_PLACEHOLDER.sub(lambda m: subs[m.group(1)], _APP_JSX_TEMPLATE)
+
+        files["src/App.jsx"] = final_app
+
+        # Add page files
+        for path, content in page_files.items():
+            files[path] = content
+
+        # styles.css fallback (small)
+        files["src/styles.css"] = _STYLES_CSS
+
+        # Add README and setup scripts
+        files["README.md"] = f"# {title}\n\nGenerated by Website Builder Agent.\n\nRun `npm install` then `npm start` to view locally."
+        files["setup.sh"] = _SETUP_SH
+        files["setup.bat"] = _SETUP_BAT
+
+        # Static preview HTML for Streamlit: simple, reflects choices.
+        # Optional blocks carry their own indent so an omitted one leaves a bare blank line.
+        preview_aside = "            <aside><nav>" + "".join(f"<div><a href='#'>{p}</a></div>" for p in pages) + "</nav></aside>" if sidebar else ""
+        preview_charts = "              <div class='card'><h3>Charts</h3><p>Placeholder chart area</p></div>" if charts else ""
+        preview_login = "              <div class='card'><h3>Login</h3><p>Login page included</p></div>" if login else ""
+        preview_html = f"""<!DOCTYPE html>
+        <html lang="en">
+        <head>
+          <meta charset="UTF-8" />
+          <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+          <title>Preview - {title}</title>
+          <style>
+            body {{ font-family: Arial, Helvetica, sans-serif; padding: 24px; max-width: 1100px; margin:auto; }}
+            header {{ background:{navbar_color}; color: white; padding: 12px 18px; border-radius:6px; }}
+            aside {{ width:220px; float:left; margin-right:18px; background:#f2f2f2; padding:12px; border-radius:6px; }}
+            main {{ overflow:auto; }}
+            .card {{ padding:12px; border:1px solid #e6e6e6; border-radius:6px; margin-bottom:12px; }}
+          </style>
+        </head>
+        <body>
+          <header><h1>{title}</h1></header>
+          <div style="display:flex; gap:18px; margin-top:18px;">
+{preview_aside}
+            <main style="flex:1;">
+              <div class="card"><h2>{pages[0]}</h2><p>Example content for {pages[0]} page.</p></div>
+{preview_charts}
+{preview_login}
+            </main>
+          </div>
+        </body>
+        </html>"""
+        files["index_preview.html"] = preview_html
+
+        return files
+
+    else:
+        # Static HTML/CSS generator for simple sites
+        pages = settings.get("pages", ["Home"])
+        title = settings.get("title", "My Site")
+        body_parts: list[str] = []
+        for p in pages:
+            body_parts.append(f"<section><h2>{p}</h2><p>Auto generated {p} page.</p></section>\n")
+        body_html = "".join(body_parts)
+        index_html = dedent(f"""<!doctype html>
+        <html>
+        <head>
+          <meta charset="utf-8"/>
+          <meta name="viewport" content="width=device-width,initial-scale=1">
+          <title>{title}</title>
+          <style>body{{font-family:Arial; padding:20px;}} header{{background:#222;color:#fff;padding:12px;border-radius:6px}}</style>
+        </head>
+        <body>
+          <header><h1>{title}</h1></header>
+          {body_html}
+        </body>
+        </html>""")
+        files["index.html"] = index_html
+        files["styles.css"] = "/* simple */"
+        return files
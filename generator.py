@@ -1,6 +1,6 @@
 import os
 import re
-from litellm import completion
+import asyncio
 from dotenv import load_dotenv
 
 # Load env vars
@@ -10,9 +10,53 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("Please set GROQ_API_KEY in your .env file")
 
-PROMPT_TEMPLATE = """
-You are a frontend code generator. 
-Generate a complete {framework} project based on the description below.
+# Markers are matched one line at a time: "--- filename ---" opens a block, "--- end ---"
+# (optionally indented) closes it
+_HEADER_RE = re.compile(r"---[ \t]*([^\r\n]+?)[ \t]*---[ \t]*\r?$")
+_END_RE = re.compile(r"[ \t]*---[ \t]*end[ \t]*---")
+
+class _BlockParser:
+    """Incremental --- filename --- / --- end --- scanner fed with streamed text chunks."""
+
+    def __init__(self, on_file=None):
+        self.files = {}
+        self.on_file = on_file
+        self._pending = ""      # trailing partial line, completed by a later chunk
+        self._current = None    # filename of the open block, None while outside one
+        self._body = []
+
+    def feed(self, chunk: str):
+        lines = (self._pending + chunk).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def close(self):
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        return self.files
+
+    def _line(self, line: str):
+        if self._current is None:
+            m = _HEADER_RE.match(line)
+            # A stray "--- end ---" outside a block is not a file named "end"
+            if m and m.group(1).strip().lower() != "end":
+                self._current, self._body = m.group(1), []
+        elif _END_RE.match(line):
+            name, content = self._current.strip(), "\n".join(self._body).strip()
+            self.files[name] = content
+            self._current = None
+            if self.on_file:
+                self.on_file(name, content)
+        else:
+            self._body.append(line)
+
+# Static instructions go in the system message and only the description varies per call,
+# so the request prefix stays byte-identical and provider-side prefix caching can reuse it
+SYSTEM_TEMPLATE = """
+You are a frontend code generator. You output only code in structured blocks.
+Generate a complete {framework} project based on the user's description.
 
 Rules:
 - Output only valid code blocks (no explanations).
@@ -20,43 +64,56 @@ Rules:
   --- filename ---
   (code here)
   --- end ---
+"""
+
+# Pre-baked per framework; any other framework is formatted per call (cheap, and keeps this dict fixed)
+SYSTEM_PROMPTS = {fw: SYSTEM_TEMPLATE.format(framework=fw) for fw in ("React + Tailwind", "Static HTML/CSS")}
 
+USER_TEMPLATE = """
 User description:
 \"\"\"{user_prompt}\"\"\"
 """
 
-def generate_project_from_prompt(user_prompt: str, framework: str = "React + Tailwind") -> dict:
+async def _stream_files(messages: list, on_file=None):
+    # litellm is a heavy import, so it is only loaded once a generation actually runs
+    from litellm import acompletion
+
+    # Parse while the response streams in, so each file is available as soon as its block closes
+    parser = _BlockParser(on_file)
+    raw = []
+    response = await acompletion(
+        model="groq/llama-3.3-70b-versatile",
+        messages=messages,
+        temperature=0.2,
+        max_tokens=4000,
+        stream=True
+    )
+    async for chunk in response:
+        delta = chunk.choices[0].delta.content or ""
+        if delta:
+            raw.append(delta)
+            parser.feed(delta)
+    return parser.close(), "".join(raw)
+
+def generate_project_from_prompt(user_prompt: str, framework: str = "React + Tailwind", on_file=None) -> dict:
     """
     Generate frontend project code files from LLM response.
+    on_file: optional callback(filename, content), called as each file finishes streaming
     Returns: dict mapping filename -> file content
     """
     print("[DEBUG] User prompt:", user_prompt)
 
-    prompt = PROMPT_TEMPLATE.format(user_prompt=user_prompt, framework=framework)
+    system_prompt = SYSTEM_PROMPTS.get(framework) or SYSTEM_TEMPLATE.format(framework=framework)
+    prompt = USER_TEMPLATE.format(user_prompt=user_prompt)
 
-    response = completion(
-        model="groq/llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": "You output only code in structured blocks."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2,
-        max_tokens=4000
-    )
-
-    text = response["choices"][0]["message"]["content"]
+    files, text = asyncio.run(_stream_files([
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ], on_file))
     print("[DEBUG] Raw response preview:", text[:400])
 
-    # Extract code blocks with filename markers
-    files = {}
-    pattern = r"---\s*(.*?)\s*---\n(.*?)---\s*end\s*---"
-    matches = re.findall(pattern, text, re.DOTALL)
-
-    if not matches:
+    if not files:
         raise ValueError("No code blocks detected. Raw output:\n" + text[:500])
 
-    for filename, content in matches:
-        files[filename.strip()] = content.strip()
-
     print("[DEBUG] Files generated:", list(files.keys()))
     return files